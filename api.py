@@ -1,10 +1,15 @@
 # api.py
 import os
-from typing import Optional
+import time
+import hashlib
+import threading
+from functools import lru_cache
+from typing import Optional, Dict, Tuple, Any
 
-from fastapi import FastAPI, Header, HTTPException, Depends, Query
+import httpx
+
+from fastapi import FastAPI, Header, HTTPException, Depends, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from supabase import create_client
 from datetime import datetime, timezone
 
 # -----------------------
@@ -21,7 +26,47 @@ if not SUPABASE_URL or not SUPABASE_KEY:
 
 API_BEARER_TOKEN = os.environ.get("API_BEARER_TOKEN", "").strip()
 
-sb = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Pre-sorted read model refreshed by the worker (sql/e2t_demo_live_sorted.sql)
+LIVE_SORTED_VIEW = "e2t_demo_live_sorted"
+LIVE_COLUMNS = (
+    "account_id,customer_name,temp_name,country,plan,equity,open_pnl,pct_change,"
+    "pct_display,created_at,last_closed_at,time_taken_hours,period,source,group_name,updated_at"
+)
+
+# If the view is missing or this key can't read it (anon key: the SQL file
+# grants it to service_role only), sort e2t_demo_live instead and don't
+# retry the view for this long.
+VIEW_RECHECK_SEC = 600.0
+_VIEW_UNAVAILABLE_UNTIL = 0.0
+
+# Data only changes once per worker cycle: let caches serve it for a bit.
+# Open endpoint -> shared caches/CDN may store it. Bearer-protected ->
+# browser-only, keyed on the Authorization header, so a CDN never hands one
+# client's authenticated response to another.
+CACHE_HEADERS_PUBLIC = {"Cache-Control": "public, s-maxage=60, stale-while-revalidate=300"}
+CACHE_HEADERS_PRIVATE = {"Cache-Control": "private, max-age=60", "Vary": "Authorization"}
+
+# In-process cache for /data/latest: limit -> (fetched_at, body, etag)
+LATEST_TTL_SEC = float(os.environ.get("E2T_API_CACHE_TTL_SEC", "30"))
+LATEST_CACHE_MAX = 4
+_LATEST_CACHE: Dict[int, Tuple[float, Dict[str, Any], str]] = {}
+_LATEST_LOCK = threading.Lock()
+
+# One pooled PostgREST client for the whole process: keep-alive HTTP/2
+# connections are reused across requests instead of a new TLS handshake
+# per query.
+pg = httpx.Client(
+    base_url=f"{SUPABASE_URL}/rest/v1",
+    headers={
+        "apikey": SUPABASE_KEY,
+        "Authorization": f"Bearer {SUPABASE_KEY}",
+        "Accept": "application/json",
+        "Accept-Profile": "public",
+    },
+    http2=True,
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=20, keepalive_expiry=30.0),
+    timeout=30.0,
+)
 
 app = FastAPI(title="E2T Demo API")
 
@@ -39,6 +84,16 @@ app.add_middleware(
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
+def pg_get(table: str, params: Dict[str, Any]) -> list:
+    """GET /rest/v1/<table> with PostgREST params; raises on HTTP errors."""
+    r = pg.get(f"/{table}", params=params)
+    r.raise_for_status()
+    return r.json() or []
+
+@lru_cache(maxsize=64)
+def _token_ok(token: str) -> bool:
+    return token == API_BEARER_TOKEN
+
 def auth(authorization: Optional[str] = Header(None)):
     """
     Optional bearer auth.
@@ -51,7 +106,7 @@ def auth(authorization: Optional[str] = Header(None)):
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing bearer token")
     token = authorization.split(" ", 1)[1]
-    if token != API_BEARER_TOKEN:
+    if not _token_ok(token):
         raise HTTPException(status_code=401, detail="Invalid bearer token")
 
 def fetch_table_sorted(
@@ -61,12 +116,74 @@ def fetch_table_sorted(
     limit: Optional[int] = None,
     extra_select: str = "*",
 ):
-    q = sb.table(name).select(extra_select)
+    params: Dict[str, Any] = {"select": extra_select}
     if order_col:
-        q = q.order(order_col, desc=desc)  # NULLs last by default when desc=True
+        params["order"] = f"{order_col}.{'desc' if desc else 'asc'}"
     if limit is not None:
-        q = q.limit(limit)
-    return q.execute().data or []
+        params["limit"] = limit
+    return pg_get(name, params)
+
+def fetch_demo_live(limit: int) -> list:
+    """
+    e2t_demo_live rows sorted by pct_display DESC, time_taken_hours ASC.
+    Reads the pre-sorted e2t_demo_live_sorted view (sort done at refresh
+    time). Only if the view is missing or access is denied does it sort
+    e2t_demo_live instead, remembering that for VIEW_RECHECK_SEC; other
+    errors (timeouts, 5xx) are raised rather than doubling the load.
+    """
+    global _VIEW_UNAVAILABLE_UNTIL
+    if time.time() >= _VIEW_UNAVAILABLE_UNTIL:
+        try:
+            return pg_get(LIVE_SORTED_VIEW, {"select": LIVE_COLUMNS, "order": "rank.asc", "limit": limit})
+        except httpx.HTTPStatusError as e:
+            if not _view_unavailable(e.response):
+                raise
+            _VIEW_UNAVAILABLE_UNTIL = time.time() + VIEW_RECHECK_SEC
+            print(
+                f"[WARN] {LIVE_SORTED_VIEW} unavailable (HTTP {e.response.status_code}: {e.response.text[:200]}); "
+                f"sorting e2t_demo_live for the next {int(VIEW_RECHECK_SEC)}s"
+            )
+    return pg_get(
+        "e2t_demo_live",
+        {"select": LIVE_COLUMNS, "order": "pct_display.desc.nullslast,time_taken_hours.asc", "limit": limit},
+    )
+
+def _view_unavailable(r: httpx.Response) -> bool:
+    """PostgREST 'relation missing' (42P01/PGRST205, 404) or 'permission denied' (42501, 401/403)."""
+    if r.status_code in (401, 403, 404):
+        return True
+    try:
+        code = (r.json() or {}).get("code")
+    except Exception:
+        code = None
+    return code in ("42P01", "42501", "PGRST205")
+
+def _etag_for(rows: list, limit: int) -> str:
+    """Weak ETag from what changes when the worker writes: newest updated_at + row count."""
+    newest = max((str(r.get("updated_at") or "") for r in rows), default="")
+    digest = hashlib.sha1(f"{limit}|{len(rows)}|{newest}".encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def latest_payload(limit: int) -> Tuple[Dict[str, Any], str]:
+    """(body, etag) for /data/latest, served from the TTL cache when fresh."""
+    now = time.time()
+    with _LATEST_LOCK:
+        hit = _LATEST_CACHE.get(limit)
+    if hit is not None and now - hit[0] < LATEST_TTL_SEC:
+        return hit[1], hit[2]
+
+    demo_live = fetch_demo_live(limit)
+    body = {
+        "ts": _now_iso(),
+        "demo_live": demo_live,
+        "count": len(demo_live),
+    }
+    etag = _etag_for(demo_live, limit)
+    with _LATEST_LOCK:
+        _LATEST_CACHE[limit] = (now, body, etag)
+        while len(_LATEST_CACHE) > LATEST_CACHE_MAX:
+            _LATEST_CACHE.pop(next(iter(_LATEST_CACHE)))
+    return body, etag
 
 # -----------------------
 # Routes
@@ -77,28 +194,26 @@ def health():
 
 @app.get("/data/latest")
 def data_latest(
+    response: Response,
     _=Depends(auth),
     limit: int = Query(5000, ge=1, le=10000),
+    if_none_match: Optional[str] = Header(None),
 ):
     """
     Demo dashboard:
     Returns the one table the frontend needs:
-      - e2t_demo_live (sorted by pct_change DESC)
+      - e2t_demo_live (sorted by pct_display DESC, time_taken_hours ASC)
+    Cached in-process for LATEST_TTL_SEC; sends Cache-Control + ETag and
+    answers 304 when the client's If-None-Match still matches.
     """
-    demo_live = (
-                    sb.table("e2t_demo_live")
-                    .select(
-                        "account_id,customer_name,temp_name,country,plan,equity,open_pnl,pct_change,"
-                        "pct_display,created_at,last_closed_at,time_taken_hours,period,source,group_name,updated_at")
-                    .order("pct_display", desc=True)
-                    .order("time_taken_hours", desc=False)
-                    .limit(limit)
-                    .execute()
-                    .data
-                ) or []
-
-    return {
-        "ts": _now_iso(),
-        "demo_live": demo_live,
-        "count": len(demo_live),
-    }
+    body, etag = latest_payload(limit)
+    cache_headers = CACHE_HEADERS_PRIVATE if API_BEARER_TOKEN else CACHE_HEADERS_PUBLIC
+    headers = {**cache_headers, "ETag": etag}
+
+    if if_none_match:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        if "*" in tags or etag in tags:
+            return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return body
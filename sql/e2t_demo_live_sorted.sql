@@ -0,0 +1,57 @@
+-- e2t_demo_live_sorted
+-- --------------------------------------------------------------------
+-- Pre-sorted, pre-projected leaderboard served by GET /data/latest (api.py).
+-- The sort (pct_display DESC NULLS LAST, time_taken_hours ASC) is paid once
+-- per worker cycle instead of on every API request: `rank` is computed at
+-- refresh time and indexed, so reads are a plain index range scan.
+--
+-- Refreshed by worker.py at the end of every run_update() via
+--   POST /rest/v1/rpc/refresh_demo_live_sorted
+-- Run this file once in the Supabase SQL editor.
+-- --------------------------------------------------------------------
+
+create materialized view if not exists public.e2t_demo_live_sorted as
+select
+  row_number() over (order by pct_display desc nulls last, time_taken_hours asc) as rank,
+  account_id,
+  customer_name,
+  temp_name,
+  country,
+  plan,
+  equity,
+  open_pnl,
+  pct_change,
+  pct_display,
+  created_at,
+  last_closed_at,
+  time_taken_hours,
+  period,
+  source,
+  group_name,
+  updated_at
+from public.e2t_demo_live;
+
+-- unique index is required for REFRESH ... CONCURRENTLY (readers never block)
+create unique index if not exists e2t_demo_live_sorted_account_id_idx
+  on public.e2t_demo_live_sorted (account_id);
+create index if not exists e2t_demo_live_sorted_rank_idx
+  on public.e2t_demo_live_sorted (rank);
+
+create or replace function public.refresh_demo_live_sorted()
+returns void
+language sql
+security definer
+set search_path = public
+as $$
+  refresh materialized view concurrently public.e2t_demo_live_sorted;
+$$;
+
+revoke all on function public.refresh_demo_live_sorted() from public, anon, authenticated;
+grant execute on function public.refresh_demo_live_sorted() to service_role;
+
+-- Materialized views have no row-level security: keep the leaderboard
+-- (customer names, equity) off the public REST surface. Only api.py reads
+-- it, with the service-role key. The explicit revoke undoes Supabase's
+-- default privileges, which grant new objects to anon/authenticated.
+revoke select on public.e2t_demo_live_sorted from anon, authenticated;
+grant select on public.e2t_demo_live_sorted to service_role;
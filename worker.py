@@ -23,7 +23,10 @@
 #  SIRIX_TOKEN (required) and SIRIX_API_URL
 #  E2T_TEST_MODE (false/true)
 #  E2T_RUN_NOW (false/true)  <-- set true to run immediately after boot
-#  E2T_RATE_DELAY_SEC (throttle between Sirix calls)
+#  E2T_RATE_DELAY_SEC (throttle between Sirix calls, per worker thread)
+#  E2T_CONCURRENCY (parallel Sirix workers, default 20)
+#  E2T_CRM_TTL_SEC (reuse the loaded CRM list for this long, default 6h)
+#  E2T_STATE_PATH / E2T_STATE_MAX_AGE_SEC (skip unchanged blown-up accounts)
 #  E2T_TZ_LABEL (string, for logs only; logic runs in UTC)
 # --------------------------------------------------------------------
 
@@ -32,11 +35,17 @@ import sys
 import time
 import math
 import json
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+import numpy as np
 import pandas as pd
 from typing import Optional, Tuple, Dict, Any, List
 from datetime import datetime, timedelta, timezone
 import random  # jitter for backoff
+import threading
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # -------------------------
 # Netlify build hook helper (optional, controlled by env flags)
@@ -52,7 +61,7 @@ def trigger_netlify_build(reason: str):
         return
     try:
         payload = {"trigger_title": f"E2T worker: {reason} @ {now_iso_utc()}"}
-        r = requests.post(url, json=payload, timeout=10)
+        r = SESSION.post(url, json=payload, timeout=10)
         if 200 <= r.status_code < 300:
             print(f"[NETLIFY] Build hook OK ({reason}).")
         else:
@@ -86,15 +95,24 @@ CRM_TABLE = os.environ.get("CRM_TABLE", "lv_tpaccount").strip()
 
 API_URL = os.environ.get("SIRIX_API_URL", "https://restapi-real3.sirixtrader.com/api/UserStatus/GetUserTransactions").strip()
 SIRIX_TOKEN = os.environ.get("SIRIX_TOKEN", "").strip()
+SIRIX_HEADERS = {
+    "Authorization": f"Bearer {SIRIX_TOKEN}",
+    "Content-Type": "application/json",
+    "Accept": "application/json",
+}
 
 TEST_MODE = os.environ.get("E2T_TEST_MODE", "false").lower() == "true"
 RUN_NOW_ON_START = os.environ.get("E2T_RUN_NOW", "true").lower() == "true"
 E2T_ENABLE_BASELINE_SEED = os.environ.get("E2T_ENABLE_BASELINE_SEED", "false").lower() == "true"
 RATE_DELAY_SEC = float(os.environ.get("E2T_RATE_DELAY_SEC", "0.2"))
+CONCURRENCY = max(1, int(os.environ.get("E2T_CONCURRENCY", "20")))
 E2T_TZ_LABEL = os.environ.get("E2T_TZ_LABEL", "UTC")
 
 # Destination tables
 TABLE_LIVE = "e2t_demo_live"
+UPSERT_BATCH = 500  # rows per bulk PostgREST upsert
+# refreshes the pre-sorted e2t_demo_live_sorted view read by api.py
+RPC_REFRESH_SORTED = "refresh_demo_live_sorted"
 START_EQUITY = float(os.environ.get("E2T_START_EQUITY", "50000"))
 
 # CRM column names (all lowercase in Supabase)
@@ -102,9 +120,48 @@ CRM_COL_ACCOUNT_ID = "lv_name"
 CRM_COL_CUSTOMER   = "lv_accountidname"
 CRM_COL_TEMP_NAME  = "lv_tempname"
 
+# Scheduler cadence (see next_2h_tick_wallclock)
+TICK_INTERVAL_SEC = 2 * 3600
+
+# Per-account state from the previous cycle ("" disables skipping)
+STATE_PATH = os.environ.get("E2T_STATE_PATH", "/tmp/e2t_state.json").strip()
+# Settled accounts are still re-checked against Sirix at least this often
+STATE_MAX_AGE_SEC = float(os.environ.get("E2T_STATE_MAX_AGE_SEC", str(7 * 24 * 3600)))
+
+# CRM list changes far less often than Sirix data: reuse it for this long.
+# Must exceed TICK_INTERVAL_SEC to ever hit between scheduled cycles; the
+# per-cycle count-drift check still catches added/removed accounts early.
+CRM_TTL_SEC = float(os.environ.get("E2T_CRM_TTL_SEC", str(3 * TICK_INTERVAL_SEC)))
+
 
 # --------------------------------------------------------------------
-# PostgREST helpers (requests-based, sync, retry-hardened)
+# Shared HTTP sessions (keep-alive: one TCP/TLS handshake per host)
+# --------------------------------------------------------------------
+def _make_session(headers: Dict[str, str] | None = None) -> requests.Session:
+    """requests.Session with a pooled adapter sized for the worker threads."""
+    pool = max(32, CONCURRENCY)
+    sess = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool, pool_maxsize=pool, max_retries=0)  # we retry ourselves
+    sess.mount("http://", adapter)
+    sess.mount("https://", adapter)
+    if headers:
+        sess.headers.update(headers)
+    return sess
+
+# PostgREST: Supabase auth headers set once on the session
+PG_SESSION = _make_session(PG_HEADERS_BASE)
+# Everything else (Sirix, Netlify): no default auth, so the Supabase key
+# never leaks to third-party hosts
+SESSION = _make_session()
+
+
+def json_body(content: bytes) -> Any:
+    """Parse a JSON response body with orjson (C parser; big Sirix payloads). Empty body -> None."""
+    return orjson.loads(content) if content else None
+
+
+# --------------------------------------------------------------------
+# PostgREST helpers (requests-based, sync, retry-hardened, pooled session)
 # --------------------------------------------------------------------
 def _retryable(err_text: str) -> bool:
     """Heuristic: which network-ish errors should we retry?"""
@@ -117,24 +174,15 @@ def _retryable(err_text: str) -> bool:
     return any(s in et for s in signals)
 
 
-def pg_select(
-    table: str,
+def _pg_params(
     select: str,
-    *,
     filters: Dict[str, str] | None = None,
     order: str | None = None,
     desc: bool = False,
     limit: int | None = None,
-    offset: int | None = None
-) -> List[Dict[str, Any]]:
-    """
-    Generic SELECT from PostgREST.
-    - `filters` must use PostgREST syntax values (e.g., {"account_id": "eq.123"})
-      We assemble the querystring like: ?select=...&account_id=eq.123
-    - `order` becomes 'order=col.asc/desc'
-    - `limit`/`offset` paginate the result
-    Returns a list[dict].
-    """
+    offset: int | None = None,
+) -> Dict[str, Any]:
+    """Assemble the PostgREST querystring shared by the SELECT helpers."""
     params: Dict[str, Any] = {"select": select}
     if order:
         params["order"] = f"{order}.{'desc' if desc else 'asc'}"
@@ -144,15 +192,19 @@ def pg_select(
         params["offset"] = offset
     if filters:
         params.update(filters)
+    return params
+
 
+def _pg_get(table: str, params: Dict[str, Any], headers: Dict[str, str] | None = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """GET with retry/backoff. Returns (rows, Content-Range header or None)."""
     backoff = 0.5
     for attempt in range(1, 7):
         try:
-            r = requests.get(f"{BASE_REST}/{table}", headers=PG_HEADERS_BASE, params=params, timeout=30)
+            r = PG_SESSION.get(f"{BASE_REST}/{table}", headers=headers, params=params, timeout=30)
             if r.status_code in (200, 206):  # 206 = partial content (range)
-                return r.json() or []
+                return (json_body(r.content) or []), r.headers.get("Content-Range")
             if r.status_code == 406:  # Not Acceptable can mean "no rows" with certain selects
-                return []
+                return [], None
             r.raise_for_status()
         except Exception as e:
             msg = str(e)
@@ -161,66 +213,223 @@ def pg_select(
                 raise
             time.sleep(backoff * (1.0 + random.random() * 0.3))
             backoff = min(backoff * 2, 10.0)
-    return []
+    return [], None
+
+
+def pg_select(
+    table: str,
+    select: str,
+    *,
+    filters: Dict[str, str] | None = None,
+    order: str | None = None,
+    desc: bool = False,
+    limit: int | None = None,
+    offset: int | None = None
+) -> List[Dict[str, Any]]:
+    """
+    Generic SELECT from PostgREST.
+    - `filters` must use PostgREST syntax values (e.g., {"account_id": "eq.123"})
+      We assemble the querystring like: ?select=...&account_id=eq.123
+    - `order` becomes 'order=col.asc/desc'
+    - `limit`/`offset` paginate the result
+    Returns a list[dict].
+    """
+    rows, _ = _pg_get(table, _pg_params(select, filters, order, desc, limit, offset))
+    return rows
 
 
-def pg_select_all(table: str, select: str, *, filters: Dict[str, str] | None = None, order: str | None = None, desc: bool = False, page_size: int = 1000) -> List[Dict[str, Any]]:
-    """Fetch **all** rows by paging with limit/offset until empty."""
+def pg_select_keyset(
+    table: str,
+    select: str,
+    key_col: str,
+    *,
+    filters: Dict[str, str] | None = None,
+    page_size: int = 1000,
+    max_rows: int | None = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch all rows with keyset pagination: order by `key_col` ASC and ask
+    for `key_col=gt.<last key seen>` on every following page. Each page is
+    an index range scan, unlike OFFSET which re-reads every earlier page.
+    - `key_col` must be selected and should be unique: rows tying on the
+      key at a page boundary would be skipped
+    - rows with a NULL key are never returned
+    - `filters` must not filter on `key_col` itself
+    """
     out: List[Dict[str, Any]] = []
-    offset = 0
-    while True:
-        chunk = pg_select(table, select, filters=filters, order=order, desc=desc, limit=page_size, offset=offset)
+    last_key: Any = None
+    while max_rows is None or len(out) < max_rows:
+        page_filters = dict(filters or {})
+        if last_key is not None:
+            page_filters[key_col] = f"gt.{last_key}"
+        chunk = pg_select(table, select, filters=page_filters, order=key_col, limit=page_size)
         if not chunk:
             break
         out.extend(chunk)
         if len(chunk) < page_size:
             break
-        offset += page_size
-    return out
+        last_key = chunk[-1].get(key_col)
+        if last_key is None:
+            break
+    return out if max_rows is None else out[:max_rows]
+
+
+def _content_range_total(value: str | None) -> Optional[int]:
+    """Parse the total from a PostgREST Content-Range header ('0-999/23456', '*/0')."""
+    if not value or "/" not in value:
+        return None
+    total = value.rsplit("/", 1)[1].strip()
+    return int(total) if total.isdigit() else None
 
 
-def pg_upsert(table: str, row: dict, on_conflict: str = "account_id") -> None:
+def pg_count(table: str, *, filters: Dict[str, str] | None = None, select: str = "*") -> Optional[int]:
+    """
+    Cheap exact row count: asks for a single row with `Prefer: count=exact`
+    and reads the total from Content-Range. Returns None if the count
+    couldn't be determined (callers treat that as "unknown").
+    """
+    params: Dict[str, Any] = {"select": select}
+    if filters:
+        params.update(filters)
+    headers = {"Prefer": "count=exact", "Range-Unit": "items", "Range": "0-0"}
+    try:
+        r = PG_SESSION.get(f"{BASE_REST}/{table}", headers=headers, params=params, timeout=30)
+        if r.status_code in (200, 206, 416):  # 416 = range not satisfiable (empty table)
+            return _content_range_total(r.headers.get("Content-Range"))
+        print(f"[WARN] pg_count {table}: HTTP {r.status_code}")
+    except Exception as e:
+        print(f"[WARN] pg_count {table}: {str(e)[:200]}")
+    return None
+
+
+def pg_upsert(table: str, row: dict, on_conflict: str = "account_id") -> bool:
     """
     UPSERT via PostgREST:
       - POST with Prefer: resolution=merge-duplicates
       - on_conflict=col_name(s)
+    Returns True on success, False after giving up (error is logged).
     """
     params = {"on_conflict": on_conflict}
-    headers = {**PG_HEADERS_BASE, "Prefer": "resolution=merge-duplicates"}
+    headers = {"Prefer": "resolution=merge-duplicates"}
     backoff = 0.5
     for attempt in range(1, 7):
         try:
-            r = requests.post(f"{BASE_REST}/{table}", headers=headers, params=params, json=row, timeout=30)
+            r = PG_SESSION.post(f"{BASE_REST}/{table}", headers=headers, params=params, json=row, timeout=30)
             if r.status_code in (200, 201, 204):
-                return
+                return True
             r.raise_for_status()
         except Exception as e:
             msg = str(e)
             if attempt == 6 or not _retryable(msg):
                 print(f"[ERROR] pg_upsert {table}: {msg[:200]} | row={str(row)[:180]}")
-                return
+                return False
+            time.sleep(backoff * (1.0 + random.random() * 0.3))
+            backoff = min(backoff * 2, 10.0)
+    return False
+
+
+def pg_upsert_many(table: str, rows: List[dict], on_conflict: str = "account_id") -> int:
+    """
+    Bulk UPSERT: POST the whole list as one JSON array (same Prefer header
+    as pg_upsert). All rows must share the same keys.
+    - Retries the chunk with backoff on timeouts, connection errors and
+      HTTP 5xx; if those are exhausted the whole chunk counts as failed
+      (per-row retries would only hammer an already struggling backend)
+    - Only a 4xx response (bad row/data) falls back to per-row pg_upsert,
+      so one bad row doesn't drop the rest of the chunk
+    Returns the number of rows written.
+    """
+    if not rows:
+        return 0
+    params = {"on_conflict": on_conflict}
+    headers = {"Prefer": "resolution=merge-duplicates"}
+    backoff = 0.5
+    for attempt in range(1, 7):
+        try:
+            r = PG_SESSION.post(f"{BASE_REST}/{table}", headers=headers, params=params, json=rows, timeout=60)
+            if r.status_code in (200, 201, 204):
+                return len(rows)
+            r.raise_for_status()
+        except Exception as e:
+            msg = str(e)
+            status = getattr(getattr(e, "response", None), "status_code", None) or 0
+            if 400 <= status < 500:
+                print(f"[ERROR] pg_upsert_many {table} ({len(rows)} rows): {msg[:200]} -> falling back to per-row")
+                return sum(1 for row in rows if pg_upsert(table, row, on_conflict=on_conflict))
+            transient = (
+                isinstance(e, (requests.Timeout, requests.ConnectionError))
+                or status >= 500
+                or _retryable(msg)
+            )
+            if attempt == 6 or not transient:
+                print(f"[ERROR] pg_upsert_many {table} ({len(rows)} rows): {msg[:200]} -> giving up on chunk")
+                return 0
             time.sleep(backoff * (1.0 + random.random() * 0.3))
             backoff = min(backoff * 2, 10.0)
+    return 0
 
 
-def pg_delete(table: str, filters: Dict[str, str]) -> None:
-    """DELETE rows matching the given PostgREST filters, e.g. {'account_id': 'eq.123'}"""
+def pg_delete(table: str, filters: Dict[str, str]) -> bool:
+    """
+    DELETE rows matching the given PostgREST filters, e.g. {'account_id': 'eq.123'}.
+    Returns True on success, False after giving up (error is logged).
+    """
     params: Dict[str, str] = {}
     params.update(filters)
     backoff = 0.5
     for attempt in range(1, 7):
         try:
-            r = requests.delete(f"{BASE_REST}/{table}", headers=PG_HEADERS_BASE, params=params, timeout=30)
+            r = PG_SESSION.delete(f"{BASE_REST}/{table}", params=params, timeout=30)
             if r.status_code in (200, 204):
-                return
+                return True
             r.raise_for_status()
         except Exception as e:
             msg = str(e)
             if attempt == 6 or not _retryable(msg):
-                print(f"[ERROR] pg_delete {table}: {msg[:200]} | filters={filters}")
-                return
+                print(f"[ERROR] pg_delete {table}: {msg[:200]} | filters={str(filters)[:180]}")
+                return False
             time.sleep(backoff * (1.0 + random.random() * 0.3))
             backoff = min(backoff * 2, 10.0)
+    return False
+
+
+def pg_delete_many(table: str, col: str, ids, chunk_size: int = 200) -> int:
+    """
+    DELETE rows whose `col` is in `ids`, using PostgREST `col=in.(a,b,...)`.
+    Ids are sent in chunks so the querystring stays well under the ~8KB URL
+    limit. Each chunk goes through pg_delete (retry/backoff).
+    Returns the number of ids in chunks that were actually deleted.
+    """
+    def _quote(v: str) -> str:
+        # double-quote so commas/parentheses inside an id can't break the list
+        return '"' + v.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+    ids = sorted({str(v) for v in ids if v is not None and str(v) != ""})
+    deleted = 0
+    for i in range(0, len(ids), chunk_size):
+        batch = ids[i:i + chunk_size]
+        if pg_delete(table, {col: f"in.({','.join(_quote(v) for v in batch)})"}):
+            deleted += len(batch)
+    return deleted
+
+
+def pg_rpc(fn: str, args: Dict[str, Any] | None = None) -> bool:
+    """Call a Postgres function via POST /rpc/<fn> (retry/backoff). Returns True on success."""
+    backoff = 0.5
+    for attempt in range(1, 7):
+        try:
+            r = PG_SESSION.post(f"{BASE_REST}/rpc/{fn}", json=args or {}, timeout=60)
+            if r.status_code in (200, 204):
+                return True
+            r.raise_for_status()
+        except Exception as e:
+            msg = str(e)
+            if attempt == 6 or not _retryable(msg):
+                print(f"[ERROR] pg_rpc {fn}: {msg[:200]}")
+                return False
+            time.sleep(backoff * (1.0 + random.random() * 0.3))
+            backoff = min(backoff * 2, 10.0)
+    return False
 
 
 # --------------------------------------------------------------------
@@ -253,26 +462,54 @@ def next_2h_tick_wallclock(now_dt: datetime) -> datetime:
         day = day + timedelta(days=1)
     return datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc).replace(hour=next_hour)
 
-def format_period(created_dt: Optional[datetime], closed_dt: Optional[datetime]) -> str:
-    # Requirement: if no closed positions (or missing dates) show zeros
-    if not created_dt or not closed_dt or closed_dt < created_dt:
-        return "00D-00H-00M"
+def next_monday_noon(now_dt: datetime) -> datetime:
+    """The next Monday 12:00 (UTC) strictly after now_dt."""
+    monday_noon = get_monday_noon(now_dt)
+    return monday_noon if monday_noon > now_dt else monday_noon + timedelta(days=7)
+
+def next_wake(now_dt: datetime) -> Tuple[datetime, str]:
+    """
+    Earliest of: next 2-hour tick OR next Monday 12:00 baseline.
+    Returns (wake_at, kind) with kind in {"baseline", "2h"}; the baseline
+    wins when both fall on the same instant (Monday 12:00 is also a 2h tick).
+    """
+    tick = next_2h_tick_wallclock(now_dt)
+    baseline = next_monday_noon(now_dt)
+    if baseline <= tick:
+        return baseline, "baseline"
+    return tick, "2h"
+
+def period_triplet(total_minutes):
+    """
+    Numeric kernel for the DD-HH-MM period: (days, hours, minutes).
+    Pure integer divmod, works on a scalar or a whole numpy array at once.
+    """
+    days, rem = np.divmod(total_minutes, 24 * 60)
+    hours, minutes = np.divmod(rem, 60)
+    return days, hours, minutes
 
-    delta = closed_dt - created_dt
-    total_minutes = int(delta.total_seconds() // 60)
+def format_periods(created: pd.Series, closed: pd.Series) -> pd.Series:
+    """
+    Vectorized DD-HH-MM period strings between two UTC datetime Series.
+    Requirement: if no closed positions (or missing dates) show zeros.
+    """
+    total_minutes = (closed - created).dt.total_seconds() // 60
+    total_minutes = total_minutes.where(total_minutes >= 0).fillna(0).astype("int64")
 
-    days = total_minutes // (24 * 60)
-    rem = total_minutes % (24 * 60)
-    hours = rem // 60
-    minutes = rem % 60
+    days, hours, minutes = period_triplet(total_minutes.to_numpy())
 
-    return f"{days:02d}D-{hours:02d}H-{minutes:02d}M"
+    # one f-string per row over plain ints beats three .str.zfill passes
+    return pd.Series(
+        [f"{d:02d}D-{h:02d}H-{m:02d}M" for d, h, m in zip(days.tolist(), hours.tolist(), minutes.tolist())],
+        index=total_minutes.index,
+        dtype=object,
+    )
 
 
 # --------------------------------------------------------------------
 # Date parsing helpers (Sirix can return different keys/formats)
 # --------------------------------------------------------------------
-CUTOFF_CREATED_AT = datetime(2026, 01, 12, 0, 0, 0, tzinfo=timezone.utc)
+CUTOFF_CREATED_AT = datetime(2026, 1, 12, 0, 0, 0, tzinfo=timezone.utc)
 
 def parse_dt_any(v: Any) -> Optional[datetime]:
     """
@@ -306,49 +543,108 @@ def pick_first_dt(obj: Dict[str, Any], keys: List[str]) -> Optional[datetime]:
     return None
 
 
+def records_dt(records: List[Dict[str, Any]], keys: List[str]) -> pd.Series:
+    """
+    Vectorized pick_first_dt over many records: for each record, the first
+    key in `keys` whose value parses (one pd.to_datetime pass per key that
+    actually occurs, not per value). Returns a UTC datetime Series (NaT
+    where nothing parsed).
+    Microsecond resolution, and values pd.to_datetime rejects are retried
+    with parse_dt_any, so out-of-ns-range dates (e.g. the .NET
+    0001-01-01 sentinel) win their key exactly as in pick_first_dt.
+    """
+    out = pd.Series(pd.NaT, index=range(len(records)), dtype="datetime64[us, UTC]")
+    for k in keys:
+        vals = [r.get(k) or None for r in records]
+        if not any(vals):
+            continue  # key not used by this payload
+        parsed = pd.to_datetime(
+            pd.Series(vals, dtype="string").str.strip(), utc=True, errors="coerce", format="ISO8601"
+        ).dt.as_unit("us")
+        retry = [i for i in np.flatnonzero(parsed.isna() & out.isna()) if vals[i]]
+        if retry:
+            parsed.iloc[retry] = [parse_dt_any(vals[i]) for i in retry]
+        out = out.fillna(parsed)
+        if not out.isna().any():
+            break
+    return out
+
+def _ts_or_none(ts: Any) -> Optional[datetime]:
+    """pandas Timestamp/NaT -> aware datetime or None."""
+    return None if pd.isna(ts) else ts.to_pydatetime()
+
+# pd.to_datetime has a fixed per-call cost; below this many records the
+# plain fromisoformat loop is faster (measured crossover ~3k records)
+VECTOR_DT_MIN_RECORDS = 3000
+
+def records_extreme_dt(records: List[Dict[str, Any]], keys: List[str], *, latest: bool) -> Optional[datetime]:
+    """Latest (or earliest) first-parseable datetime across records, or None."""
+    if len(records) >= VECTOR_DT_MIN_RECORDS:
+        times = records_dt(records, keys)
+        return _ts_or_none(times.max() if latest else times.min())
+    dts = [dt for dt in (pick_first_dt(r, keys) for r in records) if dt is not None]
+    if not dts:
+        return None
+    return max(dts) if latest else min(dts)
+
+
 # --------------------------------------------------------------------
 # CRM loader with pagination
 # --------------------------------------------------------------------
-def fetch_crm_chunk(offset: int, limit: int) -> List[Dict[str, Any]]:
+def fetch_crm_rows(page_size: int = 1000, max_rows: Optional[int] = None) -> List[Dict[str, Any]]:
     """
-    Fetch a CRM chunk [offset, offset+limit).
+    Fetch all CRM rows, keyset-paginated on CRM_COL_ACCOUNT_ID (pg_select_keyset).
     Try server-side NOT ILIKE '%purchases%' on CRM_COL_TEMP_NAME; if that fails,
     fetch unfiltered and filter client-side.
     """
     cols = f"{CRM_COL_ACCOUNT_ID},{CRM_COL_CUSTOMER},{CRM_COL_TEMP_NAME}"
     try:
         # PostgREST filter syntax example: <col>=not.ilike.*purchases*
-        data = pg_select(
+        return pg_select_keyset(
             CRM_TABLE,
             cols,
+            CRM_COL_ACCOUNT_ID,
             filters={CRM_COL_TEMP_NAME: "not.ilike.*purchases*"},
-            limit=limit,
-            offset=offset,
+            page_size=page_size,
+            max_rows=max_rows,
         )
-        return data
     except Exception:
-        data = pg_select(CRM_TABLE, cols, limit=limit, offset=offset)
-        return [r for r in data if "purchases" not in str(r.get(CRM_COL_TEMP_NAME, "")).lower()]
+        data = pg_select_keyset(CRM_TABLE, cols, CRM_COL_ACCOUNT_ID, page_size=page_size)
+        rows = [r for r in data if "purchases" not in str(r.get(CRM_COL_TEMP_NAME, "")).lower()]
+        return rows if max_rows is None else rows[:max_rows]
+
+# In-process CRM cache: {"df": DataFrame | None, "ts": load time, "count": row count at load}
+_CRM_CACHE: Dict[str, Any] = {"df": None, "ts": 0.0, "count": None}
+
+def crm_row_count() -> Optional[int]:
+    """Row count of the (Purchases-filtered) CRM table, or None if unknown."""
+    return pg_count(
+        CRM_TABLE,
+        select=CRM_COL_ACCOUNT_ID,
+        filters={CRM_COL_TEMP_NAME: "not.ilike.*purchases*"},
+    )
 
 def load_crm_filtered_df(page_size: int = 1000, hard_limit: Optional[int] = None) -> pd.DataFrame:
     """
     Load ALL CRM rows via pagination, filtering out 'Purchases' rows (case-insensitive),
     returning a dataframe with lowercase CRM columns.
+
+    Cached in-process for CRM_TTL_SEC (E2T_CRM_TTL_SEC). While cached, a
+    cheap count query still runs each cycle: if the row count drifted the
+    cache is dropped early and the table is re-paginated.
     """
-    rows: List[Dict[str, Any]] = []
-    offset = 0
-    total_loaded = 0
-    while True:
-        chunk = fetch_crm_chunk(offset, page_size)
-        if not chunk:
-            break
-        rows.extend(chunk)
-        total_loaded += len(chunk)
-        print(f"[CRM] Loaded chunk: {len(chunk)} rows (total {total_loaded})")
-        offset += page_size
-        if hard_limit is not None and total_loaded >= hard_limit:
-            rows = rows[:hard_limit]
-            break
+    use_cache = hard_limit is None and CRM_TTL_SEC > 0
+    count_now: Optional[int] = None
+    if use_cache and _CRM_CACHE["df"] is not None:
+        age = time.time() - _CRM_CACHE["ts"]
+        if age < CRM_TTL_SEC:
+            count_now = crm_row_count()
+            if count_now is None or count_now == _CRM_CACHE["count"]:
+                print(f"[CRM] Using cached CRM list ({len(_CRM_CACHE['df']):,} rows, age {int(age)}s)")
+                return _CRM_CACHE["df"].copy()
+            print(f"[CRM] Row count drifted ({_CRM_CACHE['count']} -> {count_now}); reloading")
+
+    rows = fetch_crm_rows(page_size, max_rows=hard_limit)
 
     if not rows:
         print(f"[WARN] CRM table '{CRM_TABLE}' returned 0 rows after filter.")
@@ -360,23 +656,94 @@ def load_crm_filtered_df(page_size: int = 1000, hard_limit: Optional[int] = None
             df[c] = None
     df = df.reset_index(drop=True)
     print(f"[CRM] Loaded {len(df):,} rows after server-side Purchases filter (with pagination).")
+
+    if use_cache:
+        _CRM_CACHE["df"] = df.copy()
+        _CRM_CACHE["ts"] = time.time()
+        _CRM_CACHE["count"] = count_now if count_now is not None else crm_row_count()
     return df
 
 
 # --------------------------------------------------------------------
-# Sirix fetch (unchanged logic)
+# Sirix fetch (single account + concurrent bulk)
 # --------------------------------------------------------------------
+SIRIX_MAX_ATTEMPTS = 6
+CIRCUIT_FAIL_THRESHOLD = 20   # consecutive failed calls before the breaker opens
+CIRCUIT_OPEN_SEC = 60.0       # how long an open breaker short-circuits calls
+
+# Circuit breaker state, shared by all Sirix worker threads (guarded by _CIRCUIT_LOCK)
+CIRCUIT: Dict[str, float] = {"fails": 0, "open_until": 0.0}
+_CIRCUIT_LOCK = threading.Lock()
+
+def _circuit_is_open() -> bool:
+    with _CIRCUIT_LOCK:
+        return time.time() < CIRCUIT["open_until"]
+
+def _circuit_record(ok: bool) -> None:
+    """Reset on any healthy response; open the breaker after too many consecutive failures."""
+    with _CIRCUIT_LOCK:
+        if ok:
+            CIRCUIT["fails"] = 0
+            return
+        CIRCUIT["fails"] += 1
+        if CIRCUIT["fails"] >= CIRCUIT_FAIL_THRESHOLD and time.time() >= CIRCUIT["open_until"]:
+            CIRCUIT["open_until"] = time.time() + CIRCUIT_OPEN_SEC
+            CIRCUIT["fails"] = 0
+            print(f"[SIRIX] Circuit OPEN for {int(CIRCUIT_OPEN_SEC)}s after {CIRCUIT_FAIL_THRESHOLD} consecutive failures")
+
+class SirixRejected(Exception):
+    """Sirix definitively refused this account (e.g. unknown/closed user, unusable id).
+    Unlike an outage, the account's live row should be removed."""
+
+# Non-200s that say nothing about the account itself: auth/config problems
+# or transient conditions. These never count as a rejection.
+SIRIX_NOT_REJECTION = (401, 403, 408, 429)
+
+def sirix_post(headers: Dict[str, str], payload: Dict[str, Any], clean_user_id: str) -> Optional[requests.Response]:
+    """
+    POST to Sirix with retry: timeouts/connection errors, 429 and 5xx are
+    retried with exponential backoff + full jitter (sleep U(0, backoff),
+    backoff doubling up to 10s). Other non-200s are not retried.
+    Returns the 200 response, or None when Sirix is unavailable (also while
+    the breaker is open). Raises SirixRejected on a definitive 4xx.
+    """
+    backoff = 0.5
+    err = ""
+    for attempt in range(1, SIRIX_MAX_ATTEMPTS + 1):
+        if _circuit_is_open():
+            return None
+        try:
+            resp = SESSION.post(API_URL, headers=headers, json=payload, timeout=20)
+            if resp.status_code == 200:
+                _circuit_record(True)
+                return resp
+            if resp.status_code != 429 and resp.status_code < 500:
+                # Sirix answered: not an outage, don't retry
+                print(f"[!] API {resp.status_code} for {clean_user_id}")
+                _circuit_record(True)
+                if resp.status_code in SIRIX_NOT_REJECTION:
+                    return None
+                raise SirixRejected(f"HTTP {resp.status_code}")
+            err = f"HTTP {resp.status_code}"
+        except requests.RequestException as e:
+            err = str(e)
+        if attempt < SIRIX_MAX_ATTEMPTS:
+            time.sleep(random.uniform(0, backoff))
+            backoff = min(backoff * 2, 10.0)
+
+    print(f"[!] Sirix gave up for {clean_user_id} after {SIRIX_MAX_ATTEMPTS} attempts: {err[:200]}")
+    _circuit_record(False)
+    return None
+
 def fetch_sirix_data(user_id: Any) -> Optional[Dict[str, Any]]:
     try:
         if user_id is None or (isinstance(user_id, float) and math.isnan(user_id)):
             return None
-        clean_user_id = str(int(float(user_id))).strip()
+        try:
+            clean_user_id = str(int(float(user_id))).strip()
+        except (TypeError, ValueError, OverflowError):
+            raise SirixRejected(f"not a Sirix UserID: {user_id!r}")
 
-        headers = {
-            "Authorization": f"Bearer {SIRIX_TOKEN}",
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-        }
         payload = {
             "UserID": clean_user_id,
             "GetOpenPositions": False,
@@ -385,59 +752,58 @@ def fetch_sirix_data(user_id: Any) -> Optional[Dict[str, Any]]:
             "GetMonetaryTransactions": True,
         }
 
-        resp = requests.post(API_URL, headers=headers, json=payload, timeout=20)
-        if resp.status_code != 200:
-            print(f"[!] API {resp.status_code} for {clean_user_id}")
+        resp = sirix_post(SIRIX_HEADERS, payload, clean_user_id)
+        if resp is None:
             return None
-        data = resp.json() or {}
+        data = json_body(resp.content) or {}
+
+        # resolve the nested UserData sections once
+        user_data = data.get("UserData") or {}
+        user_details = user_data.get("UserDetails") or {}
+        bal = user_data.get("AccountBalance") or {}
+        group_info = user_data.get("GroupInfo") or {}
 
-        country = (data.get("UserData") or {}).get("UserDetails", {}).get("Country")
-        bal = (data.get("UserData") or {}).get("AccountBalance") or {}
+        country = user_details.get("Country")
         balance = bal.get("Balance")
         equity = bal.get("Equity")
         open_pnl = bal.get("OpenPnL")
 
-        group_info = (data.get("UserData") or {}).get("GroupInfo") or {}
         group_name = group_info.get("GroupName")
         is_purchase_group = "purchase" in str(group_name or "").lower()
 
         txns = data.get("MonetaryTransactions") or []
 
         # ---- created_at: Prefer account creation time from UserDetails ----
-        user_details = (data.get("UserData") or {}).get("UserDetails") or {}
         created_at_dt = pick_first_dt(user_details, ["CreationTime", "CreatedAt", "CreateDate", "Time"])
 
         # Fallback: earliest monetary transaction time (if CreationTime missing)
         if created_at_dt is None:
-            for t in txns:
-                dt = pick_first_dt(t, ["CreateDate", "CreatedAt", "Date", "TransactionDate", "Time"])
-                if dt is not None:
-                    created_at_dt = dt if created_at_dt is None else min(created_at_dt, dt)
+            created_at_dt = records_extreme_dt(
+                txns, ["CreateDate", "CreatedAt", "Date", "TransactionDate", "Time"], latest=False
+            )
 
         # ---- last_closed_at: latest close position time ----
         close_positions = data.get("ClosePositions") or data.get("ClosedPositions") or []
-        last_closed_dt = None
-        for p in close_positions:
-            dt = pick_first_dt(p, ["CloseTime", "CloseDate", "CloseDatetime", "CloseAt", "Date", "Time"])
-            if dt is not None:
-                last_closed_dt = dt if last_closed_dt is None else max(last_closed_dt, dt)
+        last_closed_dt = records_extreme_dt(
+            close_positions, ["CloseTime", "CloseDate", "CloseDatetime", "CloseAt", "Date", "Time"], latest=True
+        )
 
+        # One pass over txns (comment lowercased once): first "zero balance"
+        # txn -> blown_up + its amount; first "initial balance" txn -> plan
         zero_balance_amount = None
+        blown_up = False
+        plan = None
         for t in txns:
-            c = str(t.get("Comment", "")).lower()
-            if "zero balance" in c:
+            c = str(t.get("Comment") or "").lower()
+            if not blown_up and "zero balance" in c:
+                blown_up = True
                 try:
                     zero_balance_amount = abs(float(t.get("Amount") or 0))
                 except Exception:
                     zero_balance_amount = None
-                break
-
-        blown_up = any("zero balance" in str(t.get("Comment", "")).lower() for t in txns)
-
-        plan = None
-        for t in txns:
-            if str(t.get("Comment", "")).lower().startswith("initial balance"):
+            if plan is None and c.startswith("initial balance"):
                 plan = t.get("Amount")
+            if blown_up and plan is not None:
                 break
 
         return {
@@ -453,43 +819,250 @@ def fetch_sirix_data(user_id: Any) -> Optional[Dict[str, Any]]:
             "CreatedAt": created_at_dt.isoformat() if created_at_dt else None,
             "LastClosedAt": last_closed_dt.isoformat() if last_closed_dt else None,
         }
+    except SirixRejected:
+        raise
     except Exception as e:
         print(f"[!] fetch_sirix_data exception for UserID={user_id}: {e}")
         return None
 
 
+def fetch_sirix_bulk(user_ids: List[str]) -> Tuple[Dict[str, Dict[str, Any]], set[str]]:
+    """
+    Fetch the trimmed Sirix projection for many accounts at once.
+    Sirix has no batch endpoint, so calls are fanned out over CONCURRENCY
+    worker threads (sharing SESSION's keep-alive connections).
+    Returns ({account_id: projection}, rejected account_ids). Accounts Sirix
+    was unavailable for are in neither.
+    """
+    ids = list(dict.fromkeys(user_ids))  # de-dupe, keep order
+    out: Dict[str, Dict[str, Any]] = {}
+    rejected: set[str] = set()
+
+    total = len(ids)
+    if total == 0:
+        return out, rejected
+
+    def _one(i: int, aid: str) -> Optional[Dict[str, Any]]:
+        print(f"[{i+1}/{total}] Fetch Sirix | UserID={aid}")
+        data = fetch_sirix_data(aid)
+        # throttle per worker (parallel workers each respect the delay)
+        if RATE_DELAY_SEC > 0:
+            time.sleep(RATE_DELAY_SEC)
+        return data
+
+    done = 0
+    start_ts = time.time()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY, thread_name_prefix="sirix") as pool:
+        futures = {pool.submit(_one, i, aid): aid for i, aid in enumerate(ids)}
+        for fut in as_completed(futures):
+            aid = futures[fut]
+            try:
+                data = fut.result()
+            except SirixRejected as e:
+                print(f"[SIRIX] Rejected UserID={aid}: {e}")
+                rejected.add(aid)
+                data = None
+            except Exception as e:
+                print(f"[!] Sirix worker crashed for UserID={aid}: {e}")
+                data = None
+            if data:
+                out[aid] = data
+            done += 1
+            if done % 50 == 0:
+                elapsed = int(time.time() - start_ts)
+                mm, ss = divmod(elapsed, 60)
+                print(f"[SIRIX] fetched={done}/{total} ok={len(out)} elapsed={mm:02d}:{ss:02d}")
+
+    print(f"[SIRIX] Bulk fetch done: {len(out)}/{total} accounts have data ({len(rejected)} rejected)")
+    return out, rejected
+
+
 # --------------------------------------------------------------------
-# DB helpers (table ops)
+# Cycle state (what each account looked like last cycle), JSON on disk
 # --------------------------------------------------------------------
-def upsert_row(table: str, row: dict, on_conflict: str = "account_id") -> None:
-    """UPSERT one row with retry/backoff (via pg_upsert)."""
-    pg_upsert(table, row, on_conflict=on_conflict)
-
-def delete_if_exists(table: str, account_id: str) -> None:
-    """DELETE by account_id."""
-    pg_delete(table, {"account_id": f"eq.{account_id}"})
+def load_cycle_state() -> Dict[str, Dict[str, Any]]:
+    """
+    {account_id: {"crm_key", "created_at", "last_closed_at", "blown_up", "checked_at"}}
+    from STATE_PATH, or {} if missing/unreadable. Plain JSON (never pickle):
+    the default path is in world-writable /tmp.
+    """
+    if not STATE_PATH or not os.path.exists(STATE_PATH):
+        return {}
+    try:
+        with open(STATE_PATH, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if not isinstance(state, dict):
+            return {}
+        return {str(k): v for k, v in state.items() if isinstance(v, dict)}
+    except Exception as e:
+        print(f"[WARN] Could not load cycle state: {e}")
+        return {}
 
-def norm_account_id(v: Any) -> Optional[str]:
-    """Normalize any id to a consistent string like '121477'."""
-    if v is None or (isinstance(v, float) and math.isnan(v)):
-        return None
-    s = str(v).strip()
+def save_cycle_state(state: Dict[str, Dict[str, Any]]) -> None:
+    if not STATE_PATH:
+        return
     try:
-        # Handles '121477', '121477.0', '  121477  '
-        return str(int(float(s)))
-    except Exception:
-        return s
+        # unique 0600 temp file next to the target, then atomic rename
+        fd, tmp = tempfile.mkstemp(prefix=".e2t_state.", dir=os.path.dirname(STATE_PATH) or ".")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f, separators=(",", ":"))
+            os.replace(tmp, STATE_PATH)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except Exception as e:
+        print(f"[WARN] Could not save cycle state: {e}")
+
+def crm_keys(crm: pd.DataFrame) -> pd.Series:
+    """Per-account CRM fingerprint (customer_name + temp_name) for change detection."""
+    return crm["customer_name"].astype(str) + "\x1f" + crm["temp_name"].astype(str)
+
+def settled_unchanged(crm: pd.DataFrame, keys: pd.Series, prev: Dict[str, Dict[str, Any]], now_ts: float) -> set[str]:
+    """
+    Accounts we can skip Sirix for this cycle: CRM row unchanged since the
+    last cycle AND last Sirix result was terminal (blown up -> equity can no
+    longer move) AND that result is younger than STATE_MAX_AGE_SEC.
+    Everything else (new, renamed, still trading, or due a recheck) is fetched.
+    """
+    skip: set[str] = set()
+    for aid, key in zip(crm["account_id"], keys):
+        p = prev.get(aid)
+        if (
+            p is not None
+            and p.get("crm_key") == key
+            and p.get("blown_up")
+            and now_ts - float(p.get("checked_at") or 0) < STATE_MAX_AGE_SEC
+        ):
+            skip.add(aid)
+    return skip
+
+
+def known_before_cutoff(crm: pd.DataFrame, prev: Dict[str, Dict[str, Any]]) -> set[str]:
+    """
+    Accounts whose (immutable) creation time, learned on an earlier cycle,
+    is before CUTOFF_CREATED_AT: they'll be filtered out anyway, so skip
+    the Sirix round-trip and go straight to stale-row cleanup.
+    """
+    out: set[str] = set()
+    for aid in crm["account_id"]:
+        p = prev.get(aid)
+        if p is None:
+            continue
+        created_dt = parse_dt_any(p.get("created_at"))
+        if created_dt is not None and created_dt < CUTOFF_CREATED_AT:
+            out.add(aid)
+    return out
+
+
+# --------------------------------------------------------------------
+# DB helpers (table ops)
+# --------------------------------------------------------------------
+def norm_account_ids(raw: pd.Series) -> pd.Series:
+    """
+    Normalize ids to consistent strings like '121477' (vectorized).
+    Handles '121477', '121477.0', '  121477  '; non-numeric ids are kept as
+    stripped text, as are numbers that don't fit int64 ('inf', '1e30', 20+
+    digit ids) rather than wrapping on the cast; None/NaN/blank become <NA>.
+    """
+    text = raw.astype("string").str.strip()
+    num = pd.to_numeric(text, errors="coerce").astype("float64")
+    num = num.where(np.isfinite(num) & (num.abs() < 2.0 ** 63))
+    ids = np.trunc(num).astype("Int64").astype("string").fillna(text)
+    return ids.mask(ids == "", pd.NA)
+
+# e2t_demo_live payload columns (in upsert order)
+LIVE_COLUMNS = [
+    "account_id", "customer_name", "temp_name", "country", "balance", "plan",
+    "equity", "open_pnl", "pct_change", "pct_display", "created_at", "last_closed_at",
+    "time_taken_hours", "period", "source", "group_name", "updated_at",
+]
+
+# Sirix projection keys consumed by build_live_frame
+SIRIX_PROJ_COLS = [
+    "Country", "Balance", "Equity", "OpenPnL", "GroupName",
+    "ZeroBalanceAmount", "CreatedAt", "LastClosedAt",
+]
+
+def build_live_frame(crm: pd.DataFrame, sirix_by_id: Dict[str, Dict[str, Any]]) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Build e2t_demo_live rows for ALL accounts in one vectorized pass.
+    `crm` has columns account_id (already normalized), customer_name, temp_name.
+    Returns (rows to upsert, account_ids filtered out -> stale rows to delete).
+    Filtered = missing CreationTime or created before CUTOFF_CREATED_AT.
+    """
+    res = crm.reset_index(drop=True).copy()
+    sx = (
+        pd.DataFrame.from_dict(sirix_by_id, orient="index")
+        .reindex(index=res["account_id"], columns=SIRIX_PROJ_COLS)
+        .reset_index(drop=True)
+    )
+
+    # equity: Sirix Equity when > 0, else the zero-balance txn amount when > 0
+    eq = pd.to_numeric(sx["Equity"], errors="coerce")
+    zb = pd.to_numeric(sx["ZeroBalanceAmount"], errors="coerce")
+    use_eq = eq > 0
+    use_zb = ~use_eq & (zb > 0)
+    res["equity"] = eq.where(use_eq, zb.where(use_zb))
+    res["source"] = np.select([use_eq, use_zb], ["equity", "zero_balance_txn"], default="missing")
+
+    if START_EQUITY > 0:
+        res["pct_change"] = (res["equity"] - START_EQUITY) / START_EQUITY * 100.0
+    else:
+        res["pct_change"] = np.nan
+    res["pct_display"] = res["pct_change"].clip(upper=100.0)
+
+    created = pd.to_datetime(sx["CreatedAt"], utc=True, errors="coerce", format="ISO8601")
+    closed = pd.to_datetime(sx["LastClosedAt"], utc=True, errors="coerce", format="ISO8601")
+
+    # time_taken_hours: 0 if no closed positions yet
+    hours = (closed - created).dt.total_seconds() / 3600.0
+    res["time_taken_hours"] = hours.where(hours >= 0).fillna(0.0)
+
+    # period: always a string like 02D-12H-34M (or zeros)
+    res["period"] = format_periods(created, closed)
+
+    res["country"] = sx["Country"]
+    res["balance"] = sx["Balance"]
+    res["plan"] = START_EQUITY
+    res["open_pnl"] = sx["OpenPnL"]
+    res["group_name"] = sx["GroupName"]
+    res["created_at"] = sx["CreatedAt"]
+    res["last_closed_at"] = sx["LastClosedAt"]
+    res["updated_at"] = now_iso_utc()
+
+    # If we can't determine creation time, or it's before the cutoff: skip
+    # (caller removes any stale row)
+    missing_created = created.isna()
+    before_cutoff = created < CUTOFF_CREATED_AT
+    keep = ~missing_created & ~before_cutoff
+    if missing_created.any():
+        print(f"[FILTER] {int(missing_created.sum())} account(s) missing CreationTime -> delete stale rows")
+    if before_cutoff.any():
+        print(f"[FILTER] {int(before_cutoff.sum())} account(s) created before cutoff {CUTOFF_CREATED_AT.date()} -> delete stale rows")
+
+    filtered = res.loc[~keep, "account_id"].tolist()
+    return res.loc[keep, LIVE_COLUMNS], filtered
+
+def frame_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """DataFrame -> list[dict] with NaN/NaT/<NA> as None (JSON-safe for PostgREST)."""
+    return df.astype(object).where(df.notna(), None).to_dict("records")
 
 def run_update() -> None:
     """
     Demo update with progress logs.
     - Loads CRM list
-    - Fetches Sirix for each account
-    - Upserts into e2t_demo_live
+    - Skips Sirix for unchanged blown-up accounts and accounts already known
+      to be created before the cutoff (cycle state on disk)
+    - Fetches Sirix for the rest in one fetch_sirix_bulk() fan-out
+    - Builds all e2t_demo_live rows in one vectorized pass (build_live_frame)
+    - Upserts in bulk (UPSERT_BATCH rows per request)
+    - Deletes stale rows for filtered accounts in one bulk pass at the end
+    - Refreshes the e2t_demo_live_sorted view for the API
     """
     cycle_started = now_utc()
     print("\n" + "=" * 70)
-    print(f"[CYCLE] START {cycle_started.isoformat()}  |  START_EQUITY={START_EQUITY}  |  RATE_DELAY_SEC={RATE_DELAY_SEC}")
+    print(f"[CYCLE] START {cycle_started.isoformat()}  |  START_EQUITY={START_EQUITY}  |  RATE_DELAY_SEC={RATE_DELAY_SEC}  |  CONCURRENCY={CONCURRENCY}")
     print("=" * 70)
 
     df = load_crm_filtered_df()
@@ -498,173 +1071,120 @@ def run_update() -> None:
         print("[CYCLE] No CRM rows to process. (table empty or filtered)")
         return
 
-    processed = 0
-    skipped = 0
-    sirix_missing = 0
     upsert_ok = 0
     errors = 0
 
     start_ts = time.time()
 
-    # heartbeat every N rows (so logs show activity on big datasets)
-    HEARTBEAT_EVERY = 50
-
-    for i, row in df.iterrows():
-        raw_id = row.get(CRM_COL_ACCOUNT_ID)
-        aid = norm_account_id(raw_id)
-
-        if not aid:
-            skipped += 1
-            if skipped <= 5:
-                print(f"[SKIP] Invalid account id: raw={raw_id!r}")
-            continue
-
-        cname = row.get(CRM_COL_CUSTOMER)
-        tname = row.get(CRM_COL_TEMP_NAME)
-
-        # short progress line
-        print(f"[{i+1}/{total}] Fetch Sirix | UserID raw={raw_id} norm={aid} | name={str(cname)[:24]!r}")
-
-        sirix = fetch_sirix_data(aid)
-
-        country = None
-        balance = None
-
-        equity = None
-        open_pnl = None
-        group_name = None
-        source = "missing"
-
-        if sirix:
-            country = sirix.get("Country")
-            balance = sirix.get("Balance")
-
-            group_name = sirix.get("GroupName")
-            open_pnl = sirix.get("OpenPnL")
-
-            eq = sirix.get("Equity")
-            zb = sirix.get("ZeroBalanceAmount")
-
-            created_at = sirix.get("CreatedAt")
-            last_closed_at = sirix.get("LastClosedAt")
-
-            try:
-                eq_val = float(eq) if eq is not None else None
-            except Exception:
-                eq_val = None
-
-            if eq_val is not None and eq_val > 0:
-                equity = eq_val
-                source = "equity"
-            elif zb is not None:
-                try:
-                    zb_val = float(zb)
-                except Exception:
-                    zb_val = None
-                if zb_val is not None and zb_val > 0:
-                    equity = zb_val
-                    source = "zero_balance_txn"
-        else:
-            sirix_missing += 1
-
-        pct_change = None
-        if equity is not None and START_EQUITY > 0:
-            pct_change = ((equity - START_EQUITY) / START_EQUITY) * 100.0
-
-        pct_display = None
-        if pct_change is not None:
-            pct_display = min(float(pct_change), 100.0)
-
-        created_dt = parse_dt_any(created_at)
-        closed_dt = parse_dt_any(last_closed_at)
-
-        # If we can't determine creation time, skip (and remove any stale row)
-        if created_dt is None:
-            print(f"[FILTER] Skip id={aid} missing CreationTime; deleting stale row if exists")
-            delete_if_exists(TABLE_LIVE, aid)
-            continue
-
-        # Cutoff enforcement (and cleanup stale rows)
-        if created_dt < CUTOFF_CREATED_AT:
-            print(f"[FILTER] Skip id={aid} created_at={created_dt.isoformat()} (before cutoff) -> delete stale row")
-            delete_if_exists(TABLE_LIVE, aid)
-            continue
-
-        # time_taken_hours: 0 if no closed positions yet
-        time_taken_hours = 0.0
-        if closed_dt and closed_dt >= created_dt:
-            time_taken_hours = (closed_dt - created_dt).total_seconds() / 3600.0
-
-        # period: always a string like 02D-12H-34M (or zeros)
-        period = format_period(created_dt, closed_dt)
-
-        # Print a quick “value line” so you can visually confirm it works
-        # (limit spam: only first 10 rows OR every heartbeat)
-        if (processed < 10) or ((processed + 1) % HEARTBEAT_EVERY == 0):
-            print(
-                f"[DATA] id={aid} equity={equity} open_pnl={open_pnl} "
-                f"pct={pct_change if pct_change is not None else None} source={source} group={group_name}"
-            )
-
-        payload = {
-            "account_id": aid,
-            "customer_name": cname,
-            "temp_name": tname,
-            "country": country,
-            "balance": balance,
-            "plan": START_EQUITY,
-            "equity": equity,
-            "open_pnl": open_pnl,
-            "pct_change": pct_change,
-            "pct_display": pct_display,
-            "created_at": created_at,
-            "last_closed_at": last_closed_at,
-            "time_taken_hours": time_taken_hours,
-            "period": period,
-            "source": source,
-            "group_name": group_name,
-            "updated_at": now_iso_utc(),
-        }
-
-        try:
-            upsert_row(TABLE_LIVE, payload, on_conflict="account_id")
-            upsert_ok += 1
-        except Exception as e:
-            errors += 1
-            # don’t kill whole cycle; keep going
-            print(f"[ERROR] Upsert failed for id={aid}: {e}")
-
-        processed += 1
-
-        if RATE_DELAY_SEC > 0:
-            time.sleep(RATE_DELAY_SEC)
+    # 1) normalize ids (vectorized) and drop invalid ones
+    crm = pd.DataFrame({
+        "account_id": norm_account_ids(df[CRM_COL_ACCOUNT_ID]),
+        "customer_name": df[CRM_COL_CUSTOMER],
+        "temp_name": df[CRM_COL_TEMP_NAME],
+    })
+    invalid = crm["account_id"].isna()
+    skipped = int(invalid.sum())
+    for raw_id in df.loc[invalid, CRM_COL_ACCOUNT_ID].head(5):
+        print(f"[SKIP] Invalid account id: raw={raw_id!r}")
+    # a duplicate id inside one bulk upsert would fail the whole chunk
+    crm = crm[~invalid].drop_duplicates("account_id", keep="last")
+
+    # 2) skip accounts that can't have changed since last cycle, then one
+    #    concurrent Sirix pass for the rest
+    now_ts = time.time()
+    prev_state = load_cycle_state()
+    keys = crm_keys(crm)
+    settled = settled_unchanged(crm, keys, prev_state, now_ts)
+    if settled:
+        print(f"[STATE] Skipping Sirix for {len(settled)} unchanged blown-up account(s)")
+    pre_cutoff = known_before_cutoff(crm, prev_state)
+    if pre_cutoff:
+        print(f"[STATE] Skipping Sirix for {len(pre_cutoff)} account(s) known to be created before cutoff")
+    to_fetch = crm.loc[~crm["account_id"].isin(settled | pre_cutoff), "account_id"]
+
+    sirix_by_id, rejected = fetch_sirix_bulk(to_fetch.tolist())
+    sirix_missing = int((~to_fetch.isin(sirix_by_id.keys() | rejected)).sum())
+
+    # next cycle's state: fresh results for fetched accounts, carried over otherwise
+    state: Dict[str, Dict[str, Any]] = {}
+    for aid, key in zip(crm["account_id"], keys):
+        sx = sirix_by_id.get(aid)
+        if sx is not None:
+            state[aid] = {
+                "crm_key": key,
+                "created_at": sx.get("CreatedAt"),
+                "last_closed_at": sx.get("LastClosedAt"),
+                "blown_up": bool(sx.get("BlownUp")),
+                "checked_at": now_ts,
+            }
+        elif aid in prev_state:
+            state[aid] = prev_state[aid]
+    save_cycle_state(state)
+
+    # 3) build every payload at once. Accounts Sirix was unavailable for
+    #    (errors, open circuit breaker) keep their existing live row untouched;
+    #    accounts Sirix rejected outright are cleaned up like filtered ones.
+    live, to_delete = build_live_frame(crm[crm["account_id"].isin(sirix_by_id.keys())], sirix_by_id)
+    to_delete = sorted(set(to_delete) | pre_cutoff | rejected)
+    processed = len(live)
+
+    # Print a few “value lines” so you can visually confirm it works
+    for r in live.head(10).itertuples(index=False):
+        print(
+            f"[DATA] id={r.account_id} equity={r.equity} open_pnl={r.open_pnl} "
+            f"pct={r.pct_change} source={r.source} group={r.group_name}"
+        )
 
-        # heartbeat line
-        if processed % HEARTBEAT_EVERY == 0:
-            elapsed = int(time.time() - start_ts)
-            mm, ss = divmod(elapsed, 60)
-            print(f"[HEARTBEAT] processed={processed}/{total} skipped={skipped} sirix_missing={sirix_missing} errors={errors} elapsed={mm:02d}:{ss:02d}")
+    # 4) bulk upsert
+    rows = frame_to_records(live)
+    for i in range(0, len(rows), UPSERT_BATCH):
+        batch = rows[i:i + UPSERT_BATCH]
+        ok = pg_upsert_many(TABLE_LIVE, batch, on_conflict="account_id")
+        upsert_ok += ok
+        errors += len(batch) - ok
+        elapsed = int(time.time() - start_ts)
+        mm, ss = divmod(elapsed, 60)
+        print(f"[UPSERT] {i + len(batch)}/{len(rows)} rows ({ok} ok in batch) elapsed={mm:02d}:{ss:02d}")
+
+    if to_delete:
+        n = pg_delete_many(TABLE_LIVE, "account_id", to_delete)
+        print(f"[CLEANUP] Bulk-deleted stale rows for {n}/{len(to_delete)} filtered account(s)")
+
+    # re-sort the API's read model (materialized view, see sql/e2t_demo_live_sorted.sql)
+    if pg_rpc(RPC_REFRESH_SORTED):
+        print(f"[REFRESH] {RPC_REFRESH_SORTED}() OK")
 
     elapsed = int(time.time() - start_ts)
     mm, ss = divmod(elapsed, 60)
     print("-" * 70)
-    print(f"[CYCLE] DONE processed={processed} skipped={skipped} sirix_missing={sirix_missing} upsert_ok={upsert_ok} errors={errors} runtime={mm:02d}:{ss:02d}")
+    print(f"[CYCLE] DONE processed={processed} skipped={skipped} filtered={len(to_delete)} sirix_missing={sirix_missing} upsert_ok={upsert_ok} errors={errors} runtime={mm:02d}:{ss:02d}")
     print("-" * 70)
 
     trigger_netlify_build("demo update")
 
 
 # --------------------------------------------------------------------
-# Main scheduler (immediate run-now)
+# Main scheduler (optional immediate run, then sleep until the next tick)
 # --------------------------------------------------------------------
 def main():
-    interval = int(os.environ.get("E2T_LOOP_SECONDS", "120"))  # 2 min default
-    print(f"[SERVICE] Demo worker running. interval={interval}s START_EQUITY={START_EQUITY}")
+    print(f"[SERVICE] Demo worker running. START_EQUITY={START_EQUITY} RUN_NOW={RUN_NOW_ON_START} (times in UTC, label={E2T_TZ_LABEL})")
+
+    if RUN_NOW_ON_START:
+        run_update()
 
     while True:
+        # +1s so a wake-up landing exactly on a tick schedules the *next* one
+        now = now_utc() + timedelta(seconds=1)
+        wake_at, kind = next_wake(now)
+        sleep_seconds = max(0.0, (wake_at - now_utc()).total_seconds())
+        print(f"[SCHED] Next {kind} tick at {wake_at.isoformat()} — sleeping {int(sleep_seconds)}s…")
+        time.sleep(sleep_seconds)
+
+        if kind == "baseline":
+            print("[SCHED] Monday 12:00 UTC baseline tick")
+            if E2T_ENABLE_BASELINE_SEED:
+                print("[SCHED] Baseline seeding has no separate step in this worker; running the regular update")
         run_update()
-        print(f"[SCHED] Sleeping {interval}s…")
-        time.sleep(interval)
 
 
 if __name__ == "__main__":